@@ -5,29 +5,44 @@
 # senha curta (não reutilize senhas reais) e o sorteio pode ser
 # realizado quando todos confirmarem ou pelo próprio criador do
 # grupo, que possui uma senha de criador. Os dados são
-# armazenados localmente em ``groups.json`` enquanto o aplicativo
-# estiver em execução.  Em implementações na nuvem, como o
+# armazenados localmente na pasta ``groups/`` (um arquivo por grupo)
+# enquanto o aplicativo estiver em execução.  Em implementações na nuvem, como o
 # Streamlit Community Cloud, o armazenamento persiste apenas enquanto
 # a aplicação permanece ativa.
 
-import hashlib
+import contextlib
+import hmac
 import importlib.util
 import json
 import os
 import random
-import uuid
-from collections.abc import Mapping
+import re
+import secrets
+import sys
+import tempfile
+import threading
+from collections.abc import Iterator, Mapping
+from hashlib import blake2b, sha256
+from types import SimpleNamespace
 from urllib.parse import urlparse
 
 import streamlit as st
 
 try:
-    # `filelock` é usado para garantir acesso exclusivo ao arquivo
-    # durante leitura e escrita. Isso evita condições de corrida
-    # quando múltiplas pessoas acessam o aplicativo ao mesmo tempo.
-    from filelock import FileLock
+    # `argon2-cffi` gera hashes de senha (Argon2id) propositalmente caros de
+    # calcular, o que torna inviável testar senhas em massa caso os arquivos
+    # dos grupos vazem.
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerificationError
 except ImportError:
-    FileLock = None  # fallback se a dependência não estiver instalada
+    PasswordHasher = None  # fallback para o hash BLAKE2b com chave
+
+try:
+    # `orjson` gera e interpreta JSON em C, bem mais rápido que o módulo
+    # padrão ``json`` para os arquivos dos grupos.
+    import orjson
+except ImportError:
+    orjson = None  # fallback para o módulo ``json`` da biblioteca padrão
 
 
 pyperclip_spec = importlib.util.find_spec("pyperclip")
@@ -36,84 +51,437 @@ if pyperclip_spec:
 else:
     pyperclip = None
 
-# Nome do arquivo onde os grupos são armazenados.
-DATA_FILE = "groups.json"
-LOCK_FILE = f"{DATA_FILE}.lock"
+# Cada grupo é salvo em um arquivo próprio dentro desta pasta
+# (``groups/<group_id>.json``). Assim, confirmar presença em um grupo
+# reescreve apenas o arquivo daquele grupo.
+DATA_DIR = "groups"
+# Arquivo único usado por versões anteriores. Continua sendo lido para
+# encontrar grupos antigos, que passam para ``DATA_DIR`` ao serem salvos.
+LEGACY_DATA_FILE = "groups.json"
+
+# O ``group_id`` vem da URL, então só aceitamos caracteres seguros para
+# nomes de arquivo (evita acessar caminhos fora de ``DATA_DIR``).
+GROUP_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+# Gerador usado no sorteio. Usa a fonte aleatória do sistema operacional,
+# para que o resultado não possa ser previsto a partir de sorteios anteriores.
+DRAW_RANDOM = random.SystemRandom()
 
 # URL pública padrão usada como fallback quando não conseguimos detectar
 # o endereço base automaticamente (ex.: em implantações no Streamlit
 # Cloud). Pode ser sobrescrita com as variáveis de ambiente
 # ``PUBLIC_BASE_URL`` ou ``BASE_URL``.
 DEFAULT_PUBLIC_BASE_URL = "https://amigo-miyazaki.streamlit.app/~/+"
+DEFAULT_BASE_URL = DEFAULT_PUBLIC_BASE_URL.rstrip("/")
+
+# ``st.fragment`` reexecuta apenas a função decorada quando seus widgets
+# mudam. Versões anteriores do Streamlit oferecem ``experimental_fragment``
+# ou nada; nesse caso a função roda normalmente, junto com a página.
+fragment = (
+    getattr(st, "fragment", None)
+    or getattr(st, "experimental_fragment", None)
+    or (lambda func: func)
+)
 
 
-def load_data():
-    """Carrega os grupos salvos do arquivo JSON.
+def _dumps(obj: object) -> bytes:
+    """Gera ``obj`` como JSON compacto em UTF-8.
 
-    Se o arquivo não existir ou estiver vazio, retorna um dicionário
-    vazio.  Quando disponível, utiliza ``FileLock`` para garantir
-    exclusividade de leitura enquanto outro processo escreve.
+    Os arquivos são lidos só pelo aplicativo, então dispensamos a
+    indentação. Com ``orjson`` o resultado é gerado em C; no fallback,
+    ``json.dumps`` sem indentação também usa o codificador em C.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _loads(raw: bytes) -> object:
+    """Interpreta JSON em bytes, usando ``orjson`` se disponível."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def group_file(group_id: str) -> str | None:
+    """Retorna o caminho do arquivo do grupo ou ``None`` se o ID for inválido."""
+    if not GROUP_ID_PATTERN.fullmatch(group_id):
+        return None
+    return os.path.join(DATA_DIR, f"{group_id}.json")
+
+
+def _read_file(path: str) -> dict:
+    """Lê e interpreta um arquivo JSON de dados, ou ``{}`` se falhar.
+
+    A leitura não usa lock: como as gravações trocam o arquivo de forma
+    atômica (veja ``_write_temp``), sempre lemos uma versão completa, e
+    várias sessões podem ler ao mesmo tempo sem esperar umas pelas outras.
     """
-    if not os.path.exists(DATA_FILE):
-        return {}
-    if FileLock is None:
-        # Sem suporte a filelock, leitura direta
-        try:
-            with open(DATA_FILE, "r", encoding="utf-8") as f:
-                return json.load(f) or {}
-        except Exception:
-            return {}
-    # Usando bloqueio para leitura
-    lock = FileLock(LOCK_FILE)
     try:
-        with lock:
-            with open(DATA_FILE, "r", encoding="utf-8") as f:
-                return json.load(f) or {}
+        with open(path, "rb") as f:
+            return _loads(f.read()) or {}
     except Exception:
         return {}
 
 
-def save_data(data: dict) -> None:
-    """Salva o dicionário de grupos no arquivo JSON usando lock.
+def _file_stamp(path: str) -> tuple[int, int] | None:
+    """Retorna (data de modificação, tamanho) do arquivo ou ``None``."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@st.cache_resource
+def _group_store() -> SimpleNamespace:
+    """Estado compartilhado por todas as sessões deste processo.
+
+    O Streamlit reexecuta o ``app.py`` como um módulo novo a cada execução,
+    então variáveis globais comuns não passam de uma execução para a outra.
+    O que precisa ser compartilhado fica aqui:
+
+    - ``groups``: grupos já carregados, com a versão do arquivo lido e o
+      resumo (BLAKE2b) do conteúdo que este processo gravou por último. Ficam
+      em memória entre as reexecuções e só são lidos de novo quando o
+      arquivo muda. Todas as sessões recebem o mesmo objeto de cada grupo,
+      que só deve ser alterado dentro de ``editing_group``.
+    - ``locks``: um lock por grupo (veja ``group_lock``).
+    - ``guard``: protege a criação desses locks.
+    """
+    return SimpleNamespace(groups={}, locks={}, guard=threading.Lock())
+
+
+def _intern_names(group: dict) -> None:
+    """Interna os nomes do grupo lido do disco.
+
+    O JSON gera um objeto de texto novo para cada ocorrência de um nome;
+    internando a lista e as chaves (e os valores do sorteio), todas as
+    ocorrências de um nome passam a ser o mesmo objeto.
+    """
+    participants = group.get("participants")
+    if isinstance(participants, list):
+        group["participants"] = [sys.intern(name) for name in participants]
+    for field in ("participants_confirmed", "pending_passwords"):
+        values = group.get(field)
+        if isinstance(values, dict):
+            group[field] = {sys.intern(name): value for name, value in values.items()}
+    assignments = group.get("assignments")
+    if isinstance(assignments, dict):
+        group["assignments"] = {
+            sys.intern(giver): sys.intern(receiver) for giver, receiver in assignments.items()
+        }
+
+
+def load_group(group_id: str) -> dict | None:
+    """Carrega apenas o grupo solicitado.
+
+    Procura primeiro o arquivo do grupo em ``DATA_DIR`` e, se não existir,
+    o grupo correspondente no antigo ``groups.json``. Retorna ``None`` se o
+    grupo não for encontrado. Como o Streamlit reexecuta o script a cada
+    clique, o grupo fica em memória (veja ``_group_store``) e só é lido de
+    novo quando o arquivo é modificado, por exemplo por outro processo.
+    """
+    path = group_file(group_id)
+    if path is None:
+        return None
+    stamp = _file_stamp(path)
+    if stamp is None:
+        stamp = ("legacy", _file_stamp(LEGACY_DATA_FILE))
+
+    store = _group_store().groups
+    cached = store.get(group_id)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    if stamp[0] == "legacy":
+        group = _read_file(LEGACY_DATA_FILE).get(group_id) if stamp[1] else None
+    else:
+        group = _read_file(path) or None
+    if not group:
+        # Não guardamos grupos inexistentes: qualquer ``?group_id=`` aleatório
+        # criaria uma entrada permanente na memória.
+        return None
+    # Grupos criados antes do recurso de senhas temporárias não têm o campo.
+    group.setdefault("pending_passwords", {})
+    _intern_names(group)
+    store[group_id] = (stamp, group, None)
+    return group
+
+
+def group_lock(group_id: str) -> threading.RLock:
+    """Retorna o lock em memória do grupo, criando-o na primeira vez.
 
-    Se o módulo ``filelock`` estiver disponível, utiliza um lock para
-    garantir que a escrita seja atômica, evitando corrupção de dados
-    quando várias pessoas usam o app simultaneamente.
+    As sessões do Streamlit rodam em threads do mesmo processo: quem altera
+    o mesmo grupo espera neste lock, e quem altera grupos diferentes nunca
+    espera. Os locks ficam em ``_group_store`` para serem os mesmos em
+    todas as execuções e sessões. O lock é reentrante porque
+    ``save_group`` o obtém de novo dentro de ``editing_group``.
     """
+    store = _group_store()
+    with store.guard:
+        lock = store.locks.get(group_id)
+        if lock is None:
+            lock = store.locks[group_id] = threading.RLock()
+        return lock
+
+
+@contextlib.contextmanager
+def editing_group(group_id: str) -> Iterator[dict]:
+    """Trava o grupo e entrega a versão atual dele para ser alterada.
+
+    Toda alteração (conferir, mudar e salvar) acontece dentro deste bloco.
+    Assim duas sessões não alteram o mesmo grupo ao mesmo tempo, e as
+    conferências usam o estado atual, não o que estava na tela quando a
+    pessoa clicou (outra sessão pode ter removido alguém nesse meio tempo).
+    """
+    with group_lock(group_id):
+        group = load_group(group_id)
+        if group is None:
+            st.error("Grupo não encontrado.")
+            st.stop()
+        yield group
+
+
+def _write_temp(path: str, payload: bytes) -> str:
+    """Grava ``payload`` em um arquivo temporário ao lado de ``path``.
+
+    Retorna o caminho do temporário, que depois é trocado pelo definitivo
+    com ``os.replace``. Essa troca é atômica: quem lê o arquivo enxerga a
+    versão anterior completa ou a nova completa, nunca um arquivo pela
+    metade, mesmo que o processo seja interrompido durante a escrita.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
     try:
-        if FileLock is None:
-            with open(DATA_FILE, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            return
-        lock = FileLock(LOCK_FILE)
-        with lock:
-            with open(DATA_FILE, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+    return tmp_path
+
+
+def save_group(group_id: str, group: dict) -> bool:
+    """Salva um grupo no seu próprio arquivo JSON.
+
+    O JSON é gravado em um arquivo temporário e depois trocado pelo
+    definitivo com ``os.replace``, que é atômico: não é preciso lock de
+    arquivo, e quem lê sempre encontra uma versão completa. O lock em
+    memória de ``group_lock`` fica retido só durante a troca, para que a
+    cópia em memória corresponda ao arquivo gravado. Grupos diferentes
+    não disputam o mesmo lock, e a leitura não precisa dele.
+
+    Se o conteúdo for idêntico ao da última gravação e o arquivo não tiver
+    sido alterado desde então, nada é gravado. Retorna ``False`` (e mostra
+    um erro) se não foi possível salvar.
+    """
+    path = group_file(group_id)
+    if path is None:
+        st.error("Não foi possível salvar os dados.")
+        return False
+    payload = _dumps(group)
+    digest = blake2b(payload, digest_size=16).digest()
+    saved = _group_store().groups.get(group_id)
+    if saved is not None and saved[2] == digest and saved[0] == _file_stamp(path):
+        return True
+    tmp_path = None
+    try:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        tmp_path = _write_temp(path, payload)
+        with group_lock(group_id):
+            os.replace(tmp_path, path)
+            stamp = _file_stamp(path)
+            # A memória já tem a versão mais recente; evita reler o que
+            # acabamos de gravar.
+            _group_store().groups[group_id] = (stamp, group, digest)
     except OSError:
+        if tmp_path is not None:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+        # Descarta a cópia em memória, que pode ter alterações não salvas.
+        _group_store().groups.pop(group_id, None)
         st.error("Não foi possível salvar os dados.")
+        return False
+    return True
+
+
+# Prefixo dos hashes BLAKE2b com chave. Hashes Argon2id começam com
+# ``$argon2``; hashes sem prefixo são SHA‑256 simples, gravados por versões
+# anteriores do aplicativo.
+PASSWORD_HASH_PREFIX = "blake2b$"
+ARGON2_HASH_PREFIX = "$argon2"
+
+PASSWORD_HASHER = PasswordHasher() if PasswordHasher is not None else None
+# Quantas verificações Argon2id cada sessão guarda em memória.
+VERIFIED_PASSWORDS_MAX = 32
+
+
+def _password_key() -> bytes:
+    """Obtém a chave secreta usada nos hashes de senha.
+
+    Lê ``st.secrets['PASSWORD_KEY']`` ou a variável de ambiente
+    ``PASSWORD_KEY``. Com a chave, quem obtiver os arquivos dos grupos não
+    consegue testar senhas sem conhecê-la. Sem chave configurada, o hash
+    continua funcionando, apenas sem essa proteção extra.
+    """
+    try:
+        secret_key = st.secrets.get("PASSWORD_KEY")
+    except Exception:
+        secret_key = None
+    raw = secret_key if isinstance(secret_key, str) else os.getenv("PASSWORD_KEY", "")
+    key = raw.encode()
+    if len(key) > blake2b.MAX_KEY_SIZE:
+        key = blake2b(key).digest()
+    return key
+
+
+def _keyed_hash_password(password: str) -> str:
+    """Retorna o hash BLAKE2b (com chave) da senha fornecida."""
+    hasher = blake2b(password.encode(), key=_password_key(), digest_size=32)
+    return PASSWORD_HASH_PREFIX + hasher.hexdigest()
 
 
 def hash_password(password: str) -> str:
-    """Retorna o hash SHA‑256 da senha fornecida."""
-    return hashlib.sha256(password.encode()).hexdigest()
+    """Retorna o hash Argon2id da senha fornecida, pronto para ser salvo.
+
+    A senha passa antes pelo BLAKE2b com chave, então a ``PASSWORD_KEY``
+    continua protegendo os hashes. Sem ``argon2-cffi`` instalado, salva
+    apenas o hash BLAKE2b. Senha vazia resulta em ``""``, que nunca
+    coincide com um hash salvo.
+    """
+    if not password:
+        return ""
+    keyed_hash = _keyed_hash_password(password)
+    if PASSWORD_HASHER is None:
+        return keyed_hash
+    return PASSWORD_HASHER.hash(keyed_hash)
+
+
+def _legacy_hash_password(password: str) -> str:
+    """Hash SHA‑256 usado antes da adoção do BLAKE2b."""
+    return sha256(password.encode()).hexdigest()
+
+
+def verify_password(stored_hash: str, password: str) -> bool:
+    """Confere se ``password`` corresponde ao hash salvo.
+
+    Aceita os hashes Argon2id atuais, os BLAKE2b e os SHA‑256 de grupos
+    antigos, para que ninguém precise refazer a senha após a atualização.
+    """
+    if not password:
+        return False
+    if stored_hash.startswith(ARGON2_HASH_PREFIX):
+        if PASSWORD_HASHER is None:
+            return False
+        keyed_hash = _keyed_hash_password(password)
+        # O Argon2id é lento de propósito. Guardamos o resultado na sessão
+        # (indexado pelo hash com chave, nunca pela senha) para que repetir
+        # a mesma tentativa, como clicar duas vezes em "Mostrar", seja
+        # imediato.
+        verified = st.session_state.setdefault("verified_passwords", {})
+        cache_key = f"{stored_hash}|{keyed_hash}"
+        if cache_key not in verified:
+            if len(verified) >= VERIFIED_PASSWORDS_MAX:
+                verified.clear()
+            try:
+                verified[cache_key] = PASSWORD_HASHER.verify(stored_hash, keyed_hash)
+            except (VerificationError, InvalidHashError):
+                verified[cache_key] = False
+        return verified[cache_key]
+    if stored_hash.startswith(PASSWORD_HASH_PREFIX):
+        candidate_hash = _keyed_hash_password(password)
+    else:
+        candidate_hash = _legacy_hash_password(password)
+    # Comparação em tempo constante: não revela quantos caracteres coincidem.
+    return hmac.compare_digest(candidate_hash, stored_hash)
+
+
+def password_needs_rehash(stored_hash: str) -> bool:
+    """Indica se o hash salvo deve ser refeito com os parâmetros atuais.
+
+    Vale para os hashes SHA‑256 e BLAKE2b de versões anteriores e para
+    hashes Argon2id criados com parâmetros mais fracos. Só deve ser usado
+    depois de ``verify_password`` confirmar a senha.
+    """
+    if PASSWORD_HASHER is None:
+        return not stored_hash.startswith(PASSWORD_HASH_PREFIX)
+    if not stored_hash.startswith(ARGON2_HASH_PREFIX):
+        return True
+    try:
+        return PASSWORD_HASHER.check_needs_rehash(stored_hash)
+    except InvalidHashError:
+        return False
 
 
 def generate_temp_password() -> str:
-    """Gera uma senha curta e aleatória para recuperações."""
-    return uuid.uuid4().hex[:8]
+    """Gera uma senha curta e aleatória para recuperações.
 
+    São 8 caracteres com 48 bits aleatórios, vindos do gerador seguro do
+    módulo ``secrets``.
+    """
+    return secrets.token_urlsafe(6)
 
-def resolve_base_url(request: object | None) -> str:
-    """Obtém a URL base a partir do host atual ou do ``st.secrets``.
 
-    Primeiro tenta usar ``st.secrets['BASE_URL']`` para ambientes onde o
-    endereço já é conhecido. Se não estiver definido, faz uma detecção a
-    partir de ``st.request`` (quando disponível), considerando cabeçalhos
-    comuns em proxies. Caso não seja possível determinar, utiliza um
-    endereço público padrão configurável para garantir que o link gerado
-    seja completo.
+def draw_assignments(names: list[str]) -> dict[str, str]:
+    """Sorteia quem tira quem, sem que ninguém tire a si mesmo.
+
+    Usa o algoritmo de Sattolo: uma única passada produz uma permutação
+    circular uniforme (um só ciclo com todos os nomes), então não há
+    pontos fixos nem necessidade de sortear de novo.
     """
+    receivers = list(names)
+    for i in range(len(receivers) - 1, 0, -1):
+        j = DRAW_RANDOM.randrange(i)
+        receivers[i], receivers[j] = receivers[j], receivers[i]
+    return dict(zip(names, receivers))
+
+
+def perform_draw(group_id: str) -> None:
+    """Realiza o sorteio do grupo, salva e informa o resultado na tela.
 
+    Usado tanto pelo sorteio automático quanto pelo botão do criador. O
+    grupo é salvo antes da mensagem de sucesso: se a execução for
+    interrompida depois disso, o sorteio já está gravado. Se outra pessoa
+    sortear ao mesmo tempo, vale o primeiro sorteio.
+    """
+    with editing_group(group_id) as group:
+        if group.get("drawn", False):
+            st.warning("O sorteio já foi realizado.")
+            return
+        names = group["participants"]
+        if len(names) < 2:
+            st.error("É necessário ao menos 2 participantes para sortear.")
+            return
+        group["assignments"] = draw_assignments(names)
+        group["drawn"] = True
+        if save_group(group_id, group):
+            st.success("Sorteio realizado! Agora cada participante pode ver seu amigo secreto.")
+
+
+def participant_index(group: dict) -> dict[str, int]:
+    """Índice nome -> posição dos participantes, para buscas O(1).
+
+    Deve ser montado dentro de ``editing_group``, a partir do grupo atual:
+    um índice montado ao desenhar a página pode estar desatualizado se
+    outra sessão alterou o grupo nesse meio tempo.
+    """
+    return {name: i for i, name in enumerate(group["participants"])}
+
+
+def find_giver(assignments: dict[str, str], receiver: str) -> str | None:
+    """Retorna quem tirou ``receiver`` no sorteio, se houver.
+
+    Cada pessoa é tirada por no máximo uma outra, então a busca para no
+    primeiro resultado em vez de percorrer e recriar o dicionário inteiro.
+    """
+    return next((giver for giver, name in assignments.items() if name == receiver), None)
+
+
+def _configured_base_url() -> str | None:
+    """Retorna a URL base definida em ``st.secrets`` ou no ambiente."""
     secret_base = (
         st.secrets.get("BASE_URL")
         if hasattr(st, "secrets") and isinstance(st.secrets, Mapping)
@@ -124,24 +492,36 @@ def resolve_base_url(request: object | None) -> str:
         return secret_base.rstrip("/")
     if env_base and env_base.strip():
         return env_base.rstrip("/")
+    return None
+
+
+def resolve_base_url(request: object | None) -> str:
+    """Obtém a URL base a partir do host atual ou do ``st.secrets``.
+
+    Primeiro tenta usar ``st.secrets['BASE_URL']`` para ambientes onde o
+    endereço já é conhecido. Se não estiver definido, faz uma detecção a
+    partir de ``st.request`` (quando disponível), considerando cabeçalhos
+    comuns em proxies. Caso não seja possível determinar, utiliza um
+    endereço público padrão configurável para garantir que o link gerado
+    seja completo.
+    """
+
+    configured_base = _configured_base_url()
+    if configured_base:
+        return configured_base
 
     if request is not None:
         try:
             if hasattr(request, "base_url") and request.base_url:
                 return str(request.base_url).rstrip("/")
 
-            headers = getattr(request, "headers", {}) or {}
-            host = (
-                headers.get("host")
-                or headers.get("Host")
-                or headers.get("x-forwarded-host")
-                or headers.get("X-Forwarded-Host")
-            )
+            raw_headers = getattr(request, "headers", {}) or {}
+            # Nomes de cabeçalho não diferenciam maiúsculas de minúsculas.
+            headers = {str(key).lower(): value for key, value in raw_headers.items()}
+            host = headers.get("host") or headers.get("x-forwarded-host")
             scheme = (
                 headers.get("x-forwarded-proto")
-                or headers.get("X-Forwarded-Proto")
                 or headers.get("x-forwarded-scheme")
-                or headers.get("X-Forwarded-Scheme")
                 or "https"
             )
 
@@ -150,7 +530,14 @@ def resolve_base_url(request: object | None) -> str:
         except Exception:
             return ""
 
-    return DEFAULT_PUBLIC_BASE_URL.rstrip("/")
+    return DEFAULT_BASE_URL
+
+
+def _split_base_url(base_url: str) -> tuple[str, str]:
+    """Separa a URL base em (esquema + host, caminho)."""
+    parsed_base = urlparse(base_url)
+    base_without_path = parsed_base._replace(path="", params="", query="", fragment="").geturl().rstrip("/")
+    return base_without_path, parsed_base.path or ""
 
 
 def build_full_group_link(group_id: str) -> str:
@@ -170,21 +557,10 @@ def build_full_group_link(group_id: str) -> str:
         except Exception:
             path = ""
 
-    parsed_base = urlparse(base_url)
-    base_without_path = parsed_base._replace(path="", params="", query="", fragment="").geturl().rstrip("/")
-    base_path = parsed_base.path or ""
-
-    if not path and base_path:
-        path = base_path
-    elif not path:
-        path = "/~/+"
-
-    cleaned_path = f"/{(path.lstrip('/') if path else '').lstrip('/')}" if path else ""
-
-    if base_without_path:
-        return f"{base_without_path}{cleaned_path}?group_id={group_id}"
-
-    return f"{cleaned_path or '?'}?group_id={group_id}" if cleaned_path else f"?group_id={group_id}"
+    base_without_path, base_path = _split_base_url(base_url)
+    path = path or base_path or "/~/+"
+    # Sem host conhecido, ``base_without_path`` é vazio e o link fica relativo.
+    return f"{base_without_path}/{path.lstrip('/')}?group_id={group_id}"
 
 
 def render_share_link(link: str, key_prefix: str) -> None:
@@ -219,8 +595,11 @@ def get_group_id() -> str | None:
     A API ``st.query_params`` é a forma recomendada de acessar os
     parâmetros de query a partir do Streamlit 1.30.0. Ela se comporta
     como um dicionário onde as chaves e valores são strings.  Caso o
-    parâmetro ``group_id`` não exista, retorna ``None``.
+    parâmetro ``group_id`` não exista, retorna ``None``.  O app não altera
+    a URL, então o valor é lido uma vez e guardado na sessão.
     """
+    if "group_id" in st.session_state:
+        return st.session_state["group_id"]
     try:
         # A partir do Streamlit 1.30.0 é possível acessar os parâmetros via
         # ``st.query_params``.  Este objeto retorna o último valor quando
@@ -228,15 +607,91 @@ def get_group_id() -> str | None:
         # não estiver disponível (versões antigas), fazemos um fallback
         # para a função experimental.
         params = st.query_params
-        return params.get("group_id")
+        group_id = params.get("group_id")
     except Exception:
         # Fallback: API experimental (ainda disponível em algumas versões)
         query_params = st.experimental_get_query_params()
         # ``experimental_get_query_params`` retorna listas para cada chave.
-        return query_params.get("group_id", [None])[0]
+        group_id = query_params.get("group_id", [None])[0]
+    st.session_state["group_id"] = group_id
+    return group_id
+
 
+@fragment
+def reveal_form(group_id: str, name: str) -> None:
+    """Formulário em que o participante informa a senha e vê quem tirou.
 
-def show_group_page(group_id: str, data: dict) -> None:
+    Fica em um fragmento: errar a senha ou consultar de novo reexecuta só
+    este formulário, e não a página inteira do grupo.
+    """
+    group = load_group(group_id)
+    if not group:
+        return
+    with st.form(f"reveal_flow_{group_id}", clear_on_submit=True):
+        st.subheader("Ver seu Amigo Secreto")
+        password_lookup = st.text_input(
+            "Sua senha", type="password", key=f"reveal_password_{group_id}"
+        )
+        reveal_button = st.form_submit_button("Mostrar")
+        if reveal_button:
+            stored_hash = group["participants_confirmed"].get(name)
+            if stored_hash is None:
+                st.error("Você ainda não confirmou participação.")
+            elif not verify_password(stored_hash, password_lookup):
+                st.error("Senha incorreta.")
+            else:
+                if password_needs_rehash(stored_hash):
+                    new_hash = hash_password(password_lookup)
+                    with editing_group(group_id) as current:
+                        # Só troca se ninguém mudou a senha nesse meio tempo.
+                        if current["participants_confirmed"].get(name) == stored_hash:
+                            current["participants_confirmed"][name] = new_hash
+                            save_group(group_id, current)
+                amigo = group["assignments"].get(name)
+                if amigo:
+                    st.success(f"Seu amigo secreto é: **{amigo}**.")
+                else:
+                    st.error("Sorteio ainda não foi realizado.")
+
+
+@fragment
+def creator_login(group_id: str) -> None:
+    """Campo de senha para o criador entrar no modo administrador.
+
+    Também fica em um fragmento; só quando a senha confere a página
+    inteira é recarregada, já com as ações do criador liberadas.
+    """
+    group = load_group(group_id)
+    if not group:
+        return
+    st.markdown(
+        "**Somente o criador do grupo** pode sortear antes de todos confirmarem ou adicionar pessoas. Informe a senha abaixo para acessar estas funções."
+    )
+    creator_pw_input = st.text_input(
+        "Senha do criador", type="password", key=f"creator_pw_{group_id}"
+    )
+    if st.button("Entrar no modo administrador", key=f"creator_login_{group_id}"):
+        if "creator_password_hash" not in group:
+            st.error("Este grupo não possui senha de criador.")
+        elif not creator_pw_input:
+            st.warning("Digite a senha do criador para entrar.")
+        elif not verify_password(group["creator_password_hash"], creator_pw_input):
+            st.error("Senha do criador incorreta.")
+        else:
+            # Aproveita a senha conferida para atualizar hashes antigos.
+            stored_hash = group["creator_password_hash"]
+            if password_needs_rehash(stored_hash):
+                new_hash = hash_password(creator_pw_input)
+                with editing_group(group_id) as current:
+                    if current.get("creator_password_hash") == stored_hash:
+                        current["creator_password_hash"] = new_hash
+                        save_group(group_id, current)
+            st.session_state.setdefault("admin_mode", {})[group_id] = True
+            st.success("Modo administrador ativado. As ações avançadas foram liberadas.")
+            st.rerun()
+
+
+def show_group_page(group_id: str, group: dict | None) -> None:
     """Exibe a página de um grupo específico.
 
     A página do grupo mostra quem já confirmou participação, permite
@@ -244,35 +699,40 @@ def show_group_page(group_id: str, data: dict) -> None:
     quem você tirou. Para manter a experiência simples para pessoas
     mais velhas, usamos textos diretos e instruções claras.
     """
-    group = data.get(group_id)
     if not group:
         st.error("Grupo não encontrado.")
         return
 
-    # Garante compatibilidade com grupos criados antes do recurso de senhas temporárias
-    group.setdefault("pending_passwords", {})
+    # Atalhos para os campos exibidos na página. As ações usam o grupo
+    # entregue por ``editing_group``, sempre o mais recente.
+    participants = group["participants"]
+    confirmed = group["participants_confirmed"]
 
     st.title(f"Grupo: {group['name']}")
 
-    share_link = build_full_group_link(group_id)
+    # O link não muda durante a sessão; montamos uma vez e reaproveitamos.
+    share_links = st.session_state.setdefault("share_links", {})
+    share_link = share_links.get(group_id)
+    if share_link is None:
+        share_link = share_links[group_id] = build_full_group_link(group_id)
     st.markdown("**Link do grupo para compartilhar:**")
     render_share_link(share_link, key_prefix=f"group_{group_id}")
 
-    total = len(group["participants"])
-    confirmed = len(group["participants_confirmed"])
-    st.markdown(f"**{confirmed}/{total}** participantes já confirmaram")
+    # Visão das chaves: ``in`` e ``len`` são O(1) e acompanham o dicionário.
+    confirmed_names = confirmed.keys()
+    total = len(participants)
+    st.markdown(f"**{len(confirmed_names)}/{total}** participantes já confirmaram")
 
-    st.markdown("### Como participar")
     st.markdown(
+        "### Como participar\n\n"
         "Escolha seu nome, confirme com uma senha curta e aguarde o sorteio. Depois use a mesma senha para ver quem tirou."
     )
 
     st.subheader("Sua participação")
-    name = st.selectbox("Seu nome", options=group["participants"], key=f"participant_{group_id}")
-    confirmed_hash = group["participants_confirmed"].get(name)
+    name = st.selectbox("Seu nome", options=participants, key=f"participant_{group_id}")
     draw_done = group.get("drawn", False)
 
-    if confirmed_hash is None:
+    if name not in confirmed_names:
         with st.form(f"confirm_flow_{group_id}", clear_on_submit=True):
             password = st.text_input(
                 "Crie uma senha", type="password", placeholder="Senha curta só para este grupo"
@@ -281,68 +741,42 @@ def show_group_page(group_id: str, data: dict) -> None:
             if confirm_button:
                 if not password.strip():
                     st.warning("A senha não pode ser vazia.")
-                elif name in group["pending_passwords"] and hash_password(password) != group["pending_passwords"][name]:
-                    st.error("Use a nova senha enviada pelo anfitrião.")
                 else:
-                    group["participants_confirmed"][name] = hash_password(password)
-                    group["pending_passwords"].pop(name, None)
-                    save_data(data)
-                    st.success("Participação confirmada. Aguarde o sorteio.")
+                    with editing_group(group_id) as current:
+                        current_pending = current["pending_passwords"]
+                        if name not in participant_index(current):
+                            st.warning("Este nome não está mais no grupo.")
+                        elif name in current["participants_confirmed"]:
+                            st.info("Você já confirmou. Aguarde o sorteio.")
+                        elif name in current_pending and not verify_password(
+                            current_pending[name], password
+                        ):
+                            st.error("Use a nova senha enviada pelo anfitrião.")
+                        else:
+                            pending_hash = current_pending.get(name)
+                            # A senha acabou de conferir com o hash pendente, então
+                            # ele serve como hash confirmado sem outro Argon2id.
+                            if pending_hash is None or password_needs_rehash(pending_hash):
+                                new_hash = hash_password(password)
+                            else:
+                                new_hash = pending_hash
+                            current_pending.pop(name, None)
+                            current["participants_confirmed"][name] = new_hash
+                            if save_group(group_id, current):
+                                st.success("Participação confirmada. Aguarde o sorteio.")
     elif not draw_done:
         st.info("Você já confirmou. Aguarde o sorteio.")
     
     # Botão para sortear se todos confirmaram e ainda não foi sorteado
-    if confirmed == total:
+    if len(confirmed_names) == total:
         if group.get("drawn", False):
             st.success("Sorteio já realizado!")
         else:
             if st.button("Sortear automaticamente", key=f"sortear_{group_id}"):
-                names = group["participants"]
-                if len(names) < 2:
-                    st.error("É necessário ao menos 2 participantes para sortear.")
-                else:
-                    assignments = names.copy()
-                    attempts = 0
-                    max_attempts = 1000
-                    while True:
-                        random.shuffle(assignments)
-                        if all(assignments[i] != names[i] for i in range(len(names))):
-                            break
-                        attempts += 1
-                        if attempts > max_attempts:
-                            st.error(
-                                "Não foi possível realizar o sorteio. Tente novamente."
-                            )
-                            return
-                    group["assignments"] = {
-                        names[i]: assignments[i] for i in range(len(names))
-                    }
-                    group["drawn"] = True
-                    save_data(data)
-                    st.success(
-                        "Sorteio realizado! Agora cada participante pode ver seu amigo secreto."
-                    )
+                perform_draw(group_id)
 
     if draw_done:
-        with st.form(f"reveal_flow_{group_id}", clear_on_submit=True):
-            st.subheader("Ver seu Amigo Secreto")
-            password_lookup = st.text_input(
-                "Sua senha", type="password", key=f"reveal_password_{group_id}"
-            )
-            reveal_button = st.form_submit_button("Mostrar")
-            if reveal_button:
-                stored_hash = group["participants_confirmed"].get(name)
-                if stored_hash is None:
-                    st.error("Você ainda não confirmou participação.")
-                elif hash_password(password_lookup) != stored_hash:
-                    st.error("Senha incorreta.")
-                else:
-                    amigo = group["assignments"].get(name)
-                    if amigo:
-                        st.success(f"Seu amigo secreto é: **{amigo}**.")
-                    else:
-                        st.error("Sorteio ainda não foi realizado.")
-
+        reveal_form(group_id, name)
 
     # Painel do criador: permite sortear a qualquer momento e adicionar participantes
     st.markdown("---")
@@ -350,25 +784,7 @@ def show_group_page(group_id: str, data: dict) -> None:
     admin_active = admin_flags.get(group_id, False)
     with st.expander("Painel do criador", expanded=False):
         if not admin_active:
-            st.markdown(
-                "**Somente o criador do grupo** pode sortear antes de todos confirmarem ou adicionar pessoas. Informe a senha abaixo para acessar estas funções."
-            )
-            creator_pw_input = st.text_input(
-                "Senha do criador", type="password", key=f"creator_pw_{group_id}"
-            )
-            if st.button("Entrar no modo administrador", key=f"creator_login_{group_id}"):
-                if "creator_password_hash" not in group:
-                    st.error("Este grupo não possui senha de criador.")
-                elif not creator_pw_input:
-                    st.warning("Digite a senha do criador para entrar.")
-                elif hash_password(creator_pw_input) != group["creator_password_hash"]:
-                    st.error("Senha do criador incorreta.")
-                else:
-                    admin_flags[group_id] = True
-                    st.session_state["admin_mode"] = admin_flags
-                    st.success("Modo administrador ativado. As ações avançadas foram liberadas.")
-                    st.rerun()
-
+            creator_login(group_id)
         else:
             st.markdown("**Modo administrador ativo.** Use as opções abaixo com cuidado.")
             if st.button("Sair do modo administrador", key=f"creator_logout_{group_id}"):
@@ -381,34 +797,7 @@ def show_group_page(group_id: str, data: dict) -> None:
             if st.button(
                 "Sortear agora (criador)", key=f"creator_sort_{group_id}"
             ):
-                if group.get("drawn", False):
-                    st.warning("O sorteio já foi realizado.")
-                elif len(group["participants"]) < 2:
-                    st.error("É necessário ao menos 2 participantes para sortear.")
-                else:
-                    # realizar sorteio
-                    names = group["participants"]
-                    assignments = names.copy()
-                    attempts = 0
-                    max_attempts = 1000
-                    while True:
-                        random.shuffle(assignments)
-                        if all(assignments[i] != names[i] for i in range(len(names))):
-                            break
-                        attempts += 1
-                        if attempts > max_attempts:
-                            st.error(
-                                "Não foi possível realizar o sorteio. Tente novamente."
-                            )
-                            return
-                    group["assignments"] = {
-                        names[i]: assignments[i] for i in range(len(names))
-                    }
-                    group["drawn"] = True
-                    save_data(data)
-                    st.success(
-                        "Sorteio realizado! Agora cada participante pode ver seu amigo secreto."
-                    )
+                perform_draw(group_id)
     
             st.markdown("---")
             st.subheader("Ajustes do grupo")
@@ -427,9 +816,13 @@ def show_group_page(group_id: str, data: dict) -> None:
                 if not cleaned_group_name:
                     st.warning("O nome do grupo não pode ficar vazio.")
                 else:
-                    group["name"] = cleaned_group_name
-                    save_data(data)
-                    st.success("Nome do grupo atualizado com sucesso.")
+                    with editing_group(group_id) as current:
+                        saved = True
+                        if cleaned_group_name != current["name"]:
+                            current["name"] = cleaned_group_name
+                            saved = save_group(group_id, current)
+                        if saved:
+                            st.success("Nome do grupo atualizado com sucesso.")
     
             st.markdown("---")
             st.subheader("Ajustar confirmações")
@@ -441,7 +834,7 @@ def show_group_page(group_id: str, data: dict) -> None:
             with clear_container:
                 participant_to_clear = st.selectbox(
                     "Quem precisa confirmar de novo?",
-                    options=group["participants"],
+                    options=participants,
                     key=f"clear_confirm_select_{group_id}",
                 )
                 confirm_clear = st.checkbox(
@@ -455,17 +848,26 @@ def show_group_page(group_id: str, data: dict) -> None:
                     if not confirm_clear:
                         st.info("Marque a caixa para confirmar a limpeza.")
                     else:
-                        group["participants_confirmed"].pop(participant_to_clear, None)
-                        group["pending_passwords"].pop(participant_to_clear, None)
-                        # Remove vínculos de sorteio para evitar confusão
-                        group["assignments"].pop(participant_to_clear, None)
-                        group["assignments"] = {
-                            k: v for k, v in group["assignments"].items() if v != participant_to_clear
-                        }
-                        save_data(data)
-                        st.success(
-                            f"Confirmação apagada. {participant_to_clear} precisará confirmar novamente com uma nova senha."
-                        )
+                        with editing_group(group_id) as current:
+                            assignments = current["assignments"]
+                            removed = [
+                                current["participants_confirmed"].pop(participant_to_clear, None),
+                                current["pending_passwords"].pop(participant_to_clear, None),
+                                # Remove vínculos de sorteio para evitar confusão
+                                assignments.pop(participant_to_clear, None),
+                            ]
+                            giver = find_giver(assignments, participant_to_clear)
+                            if giver is not None:
+                                del assignments[giver]
+                                removed.append(giver)
+                            # Só salva se havia algo para apagar
+                            saved = True
+                            if any(item is not None for item in removed):
+                                saved = save_group(group_id, current)
+                            if saved:
+                                st.success(
+                                    f"Confirmação apagada. {participant_to_clear} precisará confirmar novamente com uma nova senha."
+                                )
 
             reset_container = st.container()
             with reset_container:
@@ -480,12 +882,16 @@ def show_group_page(group_id: str, data: dict) -> None:
                     if not reset_confirm:
                         st.info("Marque a caixa acima para confirmar o reset.")
                     else:
-                        group["assignments"] = {}
-                        group["drawn"] = False
-                        save_data(data)
-                        st.success(
-                            "Sorteio apagado. Você pode confirmar ajustes e sortear novamente com calma."
-                        )
+                        with editing_group(group_id) as current:
+                            saved = True
+                            if current["assignments"] or current.get("drawn", False):
+                                current["assignments"] = {}
+                                current["drawn"] = False
+                                saved = save_group(group_id, current)
+                            if saved:
+                                st.success(
+                                    "Sorteio apagado. Você pode confirmar ajustes e sortear novamente com calma."
+                                )
     
             st.markdown("---")
             st.subheader("Adicionar participante")
@@ -498,18 +904,19 @@ def show_group_page(group_id: str, data: dict) -> None:
             if st.button(
                 "Adicionar participante", key=f"add_participant_{group_id}"
             ):
-                if group.get("drawn", False):
-                    st.warning("Não é possível adicionar participantes após o sorteio.")
+                name_to_add = new_participant.strip()
+                if not name_to_add:
+                    st.warning("Informe o nome do novo participante.")
                 else:
-                    name_to_add = new_participant.strip()
-                    if not name_to_add:
-                        st.warning("Informe o nome do novo participante.")
-                    elif name_to_add in group["participants"]:
-                        st.warning("Este participante já está no grupo.")
-                    else:
-                        group["participants"].append(name_to_add)
-                        save_data(data)
-                        st.success(f"{name_to_add} adicionado ao grupo.")
+                    with editing_group(group_id) as current:
+                        if current.get("drawn", False):
+                            st.warning("Não é possível adicionar participantes após o sorteio.")
+                        elif name_to_add in participant_index(current):
+                            st.warning("Este participante já está no grupo.")
+                        else:
+                            current["participants"].append(sys.intern(name_to_add))
+                            if save_group(group_id, current):
+                                st.success(f"{name_to_add} adicionado ao grupo.")
     
             st.markdown("---")
             st.subheader("Segurança e senhas")
@@ -536,17 +943,20 @@ def show_group_page(group_id: str, data: dict) -> None:
                     elif new_creator_password != confirm_creator_password:
                         st.warning("As novas senhas não conferem.")
                     else:
-                        group["creator_password_hash"] = hash_password(new_creator_password)
-                        save_data(data)
-                        st.success(
-                            "Senha do criador atualizada. Guarde a nova senha e compartilhe apenas com quem ajudará a administrar o grupo."
-                        )
+                        new_hash = hash_password(new_creator_password)
+                        with editing_group(group_id) as current:
+                            current["creator_password_hash"] = new_hash
+                            saved = save_group(group_id, current)
+                        if saved:
+                            st.success(
+                                "Senha do criador atualizada. Guarde a nova senha e compartilhe apenas com quem ajudará a administrar o grupo."
+                            )
 
             temp_pw_container = st.container()
             with temp_pw_container:
                 st.markdown("**Gerar senha temporária para participante**")
                 participant_to_reset = st.selectbox(
-                    "Escolha o participante", options=group["participants"], key=f"reset_select_{group_id}"
+                    "Escolha o participante", options=participants, key=f"reset_select_{group_id}"
                 )
                 custom_temp_password = st.text_input(
                     "Senha temporária (opcional)",
@@ -565,18 +975,23 @@ def show_group_page(group_id: str, data: dict) -> None:
                         st.info("Marque a confirmação para reiniciar o acesso.")
                     else:
                         temp_password = custom_temp_password.strip() or generate_temp_password()
-                        group["participants_confirmed"].pop(participant_to_reset, None)
-                        group["pending_passwords"][participant_to_reset] = hash_password(
-                            temp_password
-                        )
-                        save_data(data)
-                        st.success(
-                            f"A confirmação de {participant_to_reset} foi reiniciada e a senha antiga foi invalidada."
-                        )
-                        st.info(
-                            f"Copie e envie esta senha para {participant_to_reset}: **{temp_password}**. \n"
-                            "Ela precisará usar essa senha para confirmar a participação novamente."
-                        )
+                        new_hash = hash_password(temp_password)
+                        with editing_group(group_id) as current:
+                            if participant_to_reset in participant_index(current):
+                                current["participants_confirmed"].pop(participant_to_reset, None)
+                                current["pending_passwords"][participant_to_reset] = new_hash
+                                saved = save_group(group_id, current)
+                            else:
+                                st.warning("Este nome não está mais no grupo.")
+                                saved = False
+                        if saved:
+                            st.success(
+                                f"A confirmação de {participant_to_reset} foi reiniciada e a senha antiga foi invalidada."
+                            )
+                            st.info(
+                                f"Copie e envie esta senha para {participant_to_reset}: **{temp_password}**. \n"
+                                "Ela precisará usar essa senha para confirmar a participação novamente."
+                            )
     
             st.markdown("---")
             st.subheader("Gerenciar participantes")
@@ -588,7 +1003,7 @@ def show_group_page(group_id: str, data: dict) -> None:
             with rename_container:
                 selected_to_rename = st.selectbox(
                     "Quem você quer renomear?",
-                    options=group["participants"],
+                    options=participants,
                     key=f"rename_select_{group_id}",
                 )
                 new_name = st.text_input(
@@ -604,44 +1019,43 @@ def show_group_page(group_id: str, data: dict) -> None:
                     key=f"rename_btn_{group_id}",
                     use_container_width=True,
                 ):
+                    cleaned_name = sys.intern(new_name.strip())
                     if not confirm_rename:
                         st.info("Marque a confirmação para renomear.")
-                    elif group.get("drawn", False):
-                        st.warning("Não é possível renomear após o sorteio.")
+                    elif not cleaned_name:
+                        st.warning("Informe o novo nome do participante.")
                     else:
-                        cleaned_name = new_name.strip()
-                        if not cleaned_name:
-                            st.warning("Informe o novo nome do participante.")
-                        elif cleaned_name in group["participants"]:
-                            st.warning("Já existe alguém com este nome no grupo.")
-                        else:
-                            idx = group["participants"].index(selected_to_rename)
-                            group["participants"][idx] = cleaned_name
-                            if selected_to_rename in group["participants_confirmed"]:
-                                group["participants_confirmed"][cleaned_name] = group[
-                                    "participants_confirmed"
-                                ].pop(selected_to_rename)
-                            if selected_to_rename in group["pending_passwords"]:
-                                group["pending_passwords"][cleaned_name] = group[
-                                    "pending_passwords"
-                                ].pop(selected_to_rename)
-                            if selected_to_rename in group["assignments"]:
-                                group["assignments"][cleaned_name] = group[
-                                    "assignments"
-                                ].pop(selected_to_rename)
-                            for key, value in list(group["assignments"].items()):
-                                if value == selected_to_rename:
-                                    group["assignments"][key] = cleaned_name
-                            save_data(data)
-                            st.success(
-                                f"{selected_to_rename} agora se chama {cleaned_name}. Atualizamos as confirmações e o sorteio."
-                            )
+                        with editing_group(group_id) as current:
+                            index = participant_index(current)
+                            if current.get("drawn", False):
+                                st.warning("Não é possível renomear após o sorteio.")
+                            elif selected_to_rename not in index:
+                                st.warning("Este nome não está mais no grupo.")
+                            elif cleaned_name in index:
+                                st.warning("Já existe alguém com este nome no grupo.")
+                            else:
+                                current["participants"][index[selected_to_rename]] = cleaned_name
+                                for field in (
+                                    "participants_confirmed",
+                                    "pending_passwords",
+                                    "assignments",
+                                ):
+                                    values = current[field]
+                                    if selected_to_rename in values:
+                                        values[cleaned_name] = values.pop(selected_to_rename)
+                                giver = find_giver(current["assignments"], selected_to_rename)
+                                if giver is not None:
+                                    current["assignments"][giver] = cleaned_name
+                                if save_group(group_id, current):
+                                    st.success(
+                                        f"{selected_to_rename} agora se chama {cleaned_name}. Atualizamos as confirmações e o sorteio."
+                                    )
 
             remove_container = st.container()
             with remove_container:
                 selected_to_remove = st.selectbox(
                     "Quem você quer excluir?",
-                    options=group["participants"],
+                    options=participants,
                     key=f"remove_select_{group_id}",
                 )
                 confirm_delete = st.checkbox(
@@ -652,45 +1066,61 @@ def show_group_page(group_id: str, data: dict) -> None:
                     key=f"remove_btn_{group_id}",
                     use_container_width=True,
                 ):
-                    if group.get("drawn", False):
-                        st.warning("Não é possível excluir participantes após o sorteio.")
-                    elif not confirm_delete:
+                    if not confirm_delete:
                         st.info("Marque a caixa de confirmação para evitar exclusões acidentais.")
                     else:
-                        group["participants"] = [
-                            p for p in group["participants"] if p != selected_to_remove
-                        ]
-                        group["participants_confirmed"].pop(selected_to_remove, None)
-                        group["pending_passwords"].pop(selected_to_remove, None)
-                        group["assignments"].pop(selected_to_remove, None)
-                        group["assignments"] = {
-                            k: v
-                            for k, v in group["assignments"].items()
-                            if v != selected_to_remove
-                        }
-                        save_data(data)
-                        st.success(
-                            f"{selected_to_remove} foi removido do grupo. As listas de confirmação e sorteio foram atualizadas."
-                        )
-
-def show_home_page(data: dict) -> None:
-    """Exibe a página inicial para criação de novos grupos.
+                        with editing_group(group_id) as current:
+                            index = participant_index(current)
+                            if current.get("drawn", False):
+                                st.warning("Não é possível excluir participantes após o sorteio.")
+                            elif selected_to_remove not in index:
+                                st.warning("Este nome não está mais no grupo.")
+                            else:
+                                del current["participants"][index[selected_to_remove]]
+                                current["participants_confirmed"].pop(selected_to_remove, None)
+                                current["pending_passwords"].pop(selected_to_remove, None)
+                                current["assignments"].pop(selected_to_remove, None)
+                                giver = find_giver(current["assignments"], selected_to_remove)
+                                if giver is not None:
+                                    del current["assignments"][giver]
+                                if save_group(group_id, current):
+                                    st.success(
+                                        f"{selected_to_remove} foi removido do grupo. As listas de confirmação e sorteio foram atualizadas."
+                                    )
+
+
+def normalize_participants(text: str) -> tuple[list[str], set[str]]:
+    """Converte o texto digitado (um nome por linha) na lista de participantes.
+
+    Espaços extras são removidos e os nomes ficam com iniciais maiúsculas.
+    Retorna a lista sem repetições, na ordem digitada, e o conjunto dos nomes
+    repetidos (a comparação ignora maiúsculas/minúsculas).
+    """
+    # Um dicionário guarda a ordem e elimina repetidos numa só passada.
+    unique: dict[str, str] = {}
+    duplicates: set[str] = set()
+    for raw_participant in text.splitlines():
+        cleaned = " ".join(raw_participant.split())
+        if not cleaned:
+            continue
+        # Nomes internados: as listas e os dicionários do grupo passam a
+        # apontar para o mesmo objeto de texto.
+        normalized = sys.intern(cleaned.title())
+        key = normalized.casefold()
+        if key in unique:
+            duplicates.add(normalized)
+        else:
+            unique[key] = normalized
+    return list(unique.values()), duplicates
 
-    A página inicial orienta o organizador a montar um grupo de amigo secreto
-    em poucos passos. Utilizamos textos simples e uma lista de etapas
-    para facilitar o preenchimento.
+
+@fragment
+def create_group_form() -> None:
+    """Formulário de criação de grupo e o link do último grupo criado.
+
+    Fica em um fragmento para que enviar o formulário ou copiar o link
+    reexecute só este trecho, e não a página inicial inteira.
     """
-    st.title("Organizar Amigo Secreto")
-    st.markdown(
-        """
-        ### Como funciona?
-        1. Informe o **nome do grupo** (por exemplo, "Natal 2025").
-        2. Defina uma **senha do criador**. Somente quem possui essa senha
-           poderá realizar o sorteio ou adicionar novas pessoas.
-        3. Liste os participantes, colocando **um nome por linha**.
-        4. Clique em **Criar grupo** e depois compartilhe o link gerado com seus amigos.
-        """
-    )
     with st.form("create_form"):
         group_name = st.text_input("Nome do grupo")
         creator_password_input = st.text_input(
@@ -702,55 +1132,73 @@ def show_home_page(data: dict) -> None:
         )
         create_button = st.form_submit_button("Criar grupo")
         if create_button:
-            normalized_participants: list[str] = []
-            duplicate_names: set[str] = set()
-            seen_normalized: set[str] = set()
-
-            for raw_participant in participants_input.splitlines():
-                cleaned = " ".join(raw_participant.split())
-                if not cleaned:
-                    continue
-
-                normalized = cleaned.title()
-                normalized_lower = normalized.lower()
-
-                if normalized_lower in seen_normalized:
-                    duplicate_names.add(normalized)
-                    continue
-
-                seen_normalized.add(normalized_lower)
-                normalized_participants.append(normalized)
-
             if not group_name:
                 st.warning("Por favor, informe o nome do grupo.")
             elif not creator_password_input.strip():
                 st.warning("Por favor, defina uma senha para o criador.")
-            elif duplicate_names:
-                duplicates_list = ", ".join(sorted(duplicate_names))
-                st.warning(
-                    "Nomes duplicados encontrados (ignora maiúsculas/minúsculas): "
-                    f"{duplicates_list}. Ajuste a lista antes de criar o grupo."
-                )
-            elif len(normalized_participants) < 2:
-                st.warning("É necessário ao menos 2 participantes válidos.")
             else:
-                gid = uuid.uuid4().hex
-                data[gid] = {
-                    "name": group_name,
-                    "creator_password_hash": hash_password(creator_password_input),
-                    "participants": normalized_participants,
-                    "participants_confirmed": {},
-                    "pending_passwords": {},
-                    "drawn": False,
-                    "assignments": {},
-                }
-                save_data(data)
-                group_link = build_full_group_link(gid)
-                st.success("Grupo criado com sucesso!")
-                st.markdown(
-                    "**Compartilhe este link com os participantes para que confirmem a participação:**"
+                normalized_participants, duplicate_names = normalize_participants(
+                    participants_input
                 )
-                render_share_link(group_link, key_prefix=gid)
+
+                if duplicate_names:
+                    duplicates_list = ", ".join(sorted(duplicate_names))
+                    st.warning(
+                        "Nomes duplicados encontrados (ignora maiúsculas/minúsculas): "
+                        f"{duplicates_list}. Ajuste a lista antes de criar o grupo."
+                    )
+                elif len(normalized_participants) < 2:
+                    st.warning("É necessário ao menos 2 participantes válidos.")
+                else:
+                    gid = secrets.token_urlsafe(9)
+                    # 72 bits tornam colisões improváveis, mas nunca sobrescrevemos
+                    # um grupo existente. IDs do antigo ``groups.json`` têm 32
+                    # caracteres e não coincidem com estes.
+                    while os.path.exists(group_file(gid)):
+                        gid = secrets.token_urlsafe(9)
+                    group = {
+                        "name": group_name,
+                        "creator_password_hash": hash_password(creator_password_input),
+                        "participants": normalized_participants,
+                        "participants_confirmed": {},
+                        "pending_passwords": {},
+                        "drawn": False,
+                        "assignments": {},
+                    }
+                    if save_group(gid, group):
+                        # Guardamos o link na sessão para que ele continue visível nas
+                        # próximas interações (por exemplo, ao clicar em "Copiar link").
+                        st.session_state["last_created_group"] = (gid, build_full_group_link(gid))
+                        st.success("Grupo criado com sucesso!")
+
+    last_created = st.session_state.get("last_created_group")
+    if last_created:
+        gid, group_link = last_created
+        st.markdown(
+            "**Compartilhe este link com os participantes para que confirmem a participação:**"
+        )
+        render_share_link(group_link, key_prefix=gid)
+
+
+def show_home_page() -> None:
+    """Exibe a página inicial para criação de novos grupos.
+
+    A página inicial orienta o organizador a montar um grupo de amigo secreto
+    em poucos passos. Utilizamos textos simples e uma lista de etapas
+    para facilitar o preenchimento.
+    """
+    st.title("Organizar Amigo Secreto")
+    st.markdown(
+        """
+        ### Como funciona?
+        1. Informe o **nome do grupo** (por exemplo, "Natal 2025").
+        2. Defina uma **senha do criador**. Somente quem possui essa senha
+           poderá realizar o sorteio ou adicionar novas pessoas.
+        3. Liste os participantes, colocando **um nome por linha**.
+        4. Clique em **Criar grupo** e depois compartilhe o link gerado com seus amigos.
+        """
+    )
+    create_group_form()
 
     st.markdown("---")
     st.caption(
@@ -772,13 +1220,11 @@ def main() -> None:
         layout="centered",
         initial_sidebar_state="collapsed",
     )
-    data = load_data()
-
     group_id = get_group_id()
     if group_id:
-        show_group_page(group_id, data)
+        show_group_page(group_id, load_group(group_id))
     else:
-        show_home_page(data)
+        show_home_page()
 
 
 if __name__ == "__main__":